@@ -1,10 +1,12 @@
 import matplotlib
-matplotlib.use('Agg') # Mandatory for WSL
+matplotlib.use('Agg') # Mandatory for WSL (and in every frame worker, set at import)
 import os
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
 import re
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 
 # --- Global Design Settings ---
@@ -25,38 +27,55 @@ RESULTS_DIR = _get_run_dir(RESULTS_ROOT)
 LOG_FILE = RESULTS_DIR / "optimization_log.csv"
 FRAME_DURATION_MS = 150 # Slower for better readability
 
+# Tecplot VARIABLES header: "x","y","Temperature",...
+_VAR_RE = re.compile(r'"([^"]*)"')
+# Normalized (lowercase, no '_'/'-') header substring -> short name, first hit wins
+_COL_KEYS = (('coordinatex', 'x'), ('coordinatey', 'y'), ('temperature', 'T'))
+_COL_EXACT = {'x': 'x', 'y': 'y'}
+
 def load_data(folder_path):
+    """ Load data, preferring the flow.parquet written by SU2Interface.organize_files """
+    pq_file = folder_path / "flow.parquet"
+    if pq_file.exists():
+        try:
+            return pd.read_parquet(pq_file, columns=['x', 'y', 'T']), 'x', 'T'
+        except Exception as e:
+            print(f"Error loading {pq_file}: {e} (falling back to flow.dat)")
+    return _load_dat(folder_path)
+
+def _load_dat(folder_path):
     """ Load data with SU2 format support """
     dat_file = folder_path / "flow.dat"
     if not dat_file.exists(): return None, None, None
 
     try:
-        with open(dat_file, 'r') as f:
-            lines = f.readlines()
-        
+        # Stream the header only, stop at ZONE (never read the data body here)
         header_rows = 0
         col_names = []
-        for i, line in enumerate(lines):
-            if "VARIABLES" in line: col_names = re.findall(r'"(.*?)"', line)
-            if "ZONE" in line: header_rows = i + 1; break
-        
-        df = pd.read_csv(dat_file, skiprows=header_rows, sep='\s+', names=col_names, on_bad_lines='skip')
+        with open(dat_file, 'r') as f:
+            for i, line in enumerate(f):
+                if "VARIABLES" in line: col_names = _VAR_RE.findall(line)
+                if "ZONE" in line:
+                    header_rows = i + 1
+                    break
         
+        # Map header names first, so only the needed columns are parsed
         rename_map = {}
-        for col in df.columns:
-            c = col.lower()
-            if 'x' == c or "coordinatex" in c: rename_map[col] = 'x'
-            if 'y' == c or "coordinatey" in c: rename_map[col] = 'y'
-            if "temperature" in c: rename_map[col] = 'T'
-        df.rename(columns=rename_map, inplace=True)
+        for col in col_names:
+            c = col.lower().replace('_', '').replace('-', '')
+            out = _COL_EXACT.get(c) or next((name for key, name in _COL_KEYS if key in c), None)
+            if out and out not in rename_map.values(): rename_map[col] = out
         
-        # Force numeric conversion to handle malformed data
-        for col in ['x', 'y', 'T']:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        # C tokenizer (sep=r'\s+' stays on engine='c') parses float32 directly,
+        # malformed fields become NaN
+        df = pd.read_csv(dat_file, skiprows=header_rows, sep=r'\s+', names=col_names,
+                         usecols=list(rename_map), engine='c', dtype=np.float32,
+                         low_memory=False, on_bad_lines='skip')
+        df.rename(columns=rename_map, inplace=True)
         
         # Drop rows with NaN values
-        df = df.dropna(subset=['x', 'y', 'T'])
+        if 'x' in df.columns and 'y' in df.columns and 'T' in df.columns:
+            df = df.dropna(subset=['x', 'y', 'T'])
         
         if 'x' in df.columns and 'y' in df.columns and 'T' in df.columns:
             return df, 'x', 'T'
@@ -65,6 +84,94 @@ def load_data(folder_path):
         return None, None, None
     return None, None, None
 
+# Per-process figure and the artists updated per frame, built by _init_figure
+_FRAME = None
+
+def _init_figure():
+    """ Builds the frame figure once per (worker) process; static art is drawn here """
+    global _FRAME
+
+    # --- PLOTTING DESIGN (Original design restored) ---
+    # One figure for every frame: only the data/text artists change per iteration
+    fig, ax = plt.subplots(figsize=(12, 7), dpi=100) # 1200x700 px, the size the GIF is viewed at
+
+    # 1. Main Line (RANS) - data and colour are set per frame
+    line_rans, = ax.plot([], [], color='#00ff9d', linewidth=3, label=f'RANS Prediction')
+
+    # 2. Reference Line (Wall BC)
+    ax.axhline(y=300, color='white', linestyle='--', linewidth=1.5, alpha=0.6, label='Wall BC ($T_{wall}=300K$)')
+
+    # 3. Limits and Grid
+    ax.set_xlim(0.0001, 1.0) 
+    ax.set_ylim(280, 650) 
+    ax.grid(True, which='major', linestyle='--', linewidth=0.5, alpha=0.3)
+
+    # 4. Titles and Texts
+    title = ax.set_title("", fontsize=18, color='white', pad=20)
+    ax.set_xlabel("Position along Plate [m]", fontsize=14)
+    ax.set_ylabel("Temperature [K]", fontsize=14)
+
+    # Tight margins computed once (replaces savefig's bbox_inches='tight'),
+    # with a full-length title so the per-frame text always fits
+    title.set_text("Automated Calibration Loop | Iteration 00 [CONVERGED]")
+    fig.tight_layout()
+
+    # 6. Styled Text Box (The Visual "Trojan Horse"): one artist, text/colours set per frame
+    props = dict(boxstyle='round,pad=0.5', facecolor='#222222', alpha=0.9, edgecolor='#00ff9d', linewidth=1.5)
+    hud = ax.text(0.70, 0.95, "", transform=ax.transAxes, fontsize=13, 
+                  verticalalignment='top', bbox=props, family='monospace', color='#00ff9d')
+
+    _FRAME = (fig, ax, line_rans, title, hud)
+
+def _render_frame(job):
+    """ Renders one log row (iteration, Pr_t, RMSE, is_best) to an RGB frame, None if its data is missing """
+    iteration, pr_val, rmse_val, is_best = job
+
+    # Construct folder name
+    folder_name = f"Pr_{pr_val:.4f}" # Folder name must match previous code output
+    folder_path = RESULTS_DIR / folder_name
+    
+    if not folder_path.exists():
+        print(f"Skipping Iter {iteration} (Folder missing)")
+        return None
+
+    df_flow, x_col, t_col = load_data(folder_path)
+    if df_flow is None: return None
+
+    # Prepare data for plotting
+    df_wall = df_flow[df_flow['y'] < 0.0001].sort_values(by=x_col)
+
+    fig, ax, line_rans, title, hud = _FRAME
+
+    # Color logic: Gold for optimal, Green for others
+    main_color = '#ffd700' if is_best else '#00ff9d' # Gold vs Neon Green
+    status_txt = "OPTIMAL SOLUTION" if is_best else "OPTIMIZING..."
+    status_color = '#ffd700' if is_best else '#00ff9d'
+    
+    # 1. Main Line (RANS)
+    line_rans.set_data(df_wall[x_col].to_numpy(), df_wall[t_col].to_numpy())
+    line_rans.set_color(main_color)
+
+    # 4. Titles and Texts
+    title_str = f"Automated Calibration Loop | Iteration {iteration:02d}"
+    if is_best: title_str += " [CONVERGED]"
+    title.set_text(title_str)
+
+    # 5. Legend (Exact location from previous design), rebuilt so the RANS entry takes the frame colour
+    ax.legend(loc='lower right', bbox_to_anchor=(0.98, 0.1), fontsize=12, frameon=True, facecolor='#111111', edgecolor='#333333')
+
+    # 6. Styled Text Box (The Visual "Trojan Horse")
+    # Added RMSE to show real-time improvement
+    text_str = f"MACH: 14.0\nPR_T: {pr_val:.4f}\nRMSE: {rmse_val:.4f}\nSTATUS: {status_txt}"
+    
+    hud.set_text(text_str)
+    hud.set_color(status_color)
+    hud.get_bbox_patch().set_edgecolor(status_color)
+
+    # Render in memory, no PNG on disk; kept as RGB until the GIF palette is chosen
+    fig.canvas.draw()
+    return Image.fromarray(np.asarray(fig.canvas.buffer_rgba())).convert('RGB')
+
 def create_frames_from_log():
     # 1. Read the Log
     if not LOG_FILE.exists():
@@ -77,110 +184,70 @@ def create_frames_from_log():
     best_idx = df_log['RMSE'].idxmin()
     best_pr_global = df_log.loc[best_idx, 'Pr_t']
     
-    image_paths = []
-    best_frame_path = None
+    frames = []
+    best_frame = None
 
     print(f"Rendering {len(df_log)} frames based on Log...")
 
-    for index, row in df_log.iterrows():
-        iteration = int(row['Iteration'])
-        pr_val = row['Pr_t']
-        rmse_val = row['RMSE']
-        
-        # Construct folder name
-        folder_name = f"Pr_{pr_val:.4f}" # Folder name must match previous code output
-        folder_path = RESULTS_DIR / folder_name
-        
-        if not folder_path.exists():
-            print(f"Skipping Iter {iteration} (Folder missing)")
-            continue
-
-        df_flow, x_col, t_col = load_data(folder_path)
-        if df_flow is None: continue
-
-        # Prepare data for plotting
-        df_wall = df_flow[df_flow['y'] < 0.0001].sort_values(by=x_col)
-
-        # --- PLOTTING DESIGN (Original design restored) ---
-        fig, ax = plt.subplots(figsize=(12, 7), dpi=200)
+    jobs = [(int(row['Iteration']), row['Pr_t'], row['RMSE'], index == best_idx) for index, row in df_log.iterrows()]
 
-        # Color logic: Gold for optimal, Green for others
-        is_best = (index == best_idx)
-        
-        main_color = '#ffd700' if is_best else '#00ff9d' # Gold vs Neon Green
-        status_txt = "OPTIMAL SOLUTION" if is_best else "OPTIMIZING..."
-        status_color = '#ffd700' if is_best else '#00ff9d'
-        
-        # 1. Main Line (RANS)
-        ax.plot(df_wall[x_col], df_wall[t_col], color=main_color, linewidth=3, label=f'RANS Prediction')
-
-        # 2. Reference Line (Wall BC)
-        ax.axhline(y=300, color='white', linestyle='--', linewidth=1.5, alpha=0.6, label='Wall BC ($T_{wall}=300K$)')
-
-        # 3. Limits and Grid
-        ax.set_xlim(0.0001, 1.0) 
-        ax.set_ylim(280, 650) 
-        ax.grid(True, which='major', linestyle='--', linewidth=0.5, alpha=0.3)
-        
-        # 4. Titles and Texts
-        title_str = f"Automated Calibration Loop | Iteration {iteration:02d}"
-        if is_best: title_str += " [CONVERGED]"
-        
-        ax.set_title(title_str, fontsize=18, color='white', pad=20)
-        ax.set_xlabel("Position along Plate [m]", fontsize=14)
-        ax.set_ylabel("Temperature [K]", fontsize=14)
+    # Frames are independent: render them on all cores, each worker draws on its own figure
+    # (map() returns them in log order)
+    n_workers = max(1, min(len(jobs), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_figure) as pool:
+        rendered = list(pool.map(_render_frame, jobs))
 
-        # 5. Legend (Exact location from previous design)
-        ax.legend(loc='lower right', bbox_to_anchor=(0.98, 0.1), fontsize=12, frameon=True, facecolor='#111111', edgecolor='#333333')
-
-        # 6. Styled Text Box (The Visual "Trojan Horse")
-        # Added RMSE to show real-time improvement
-        text_str = f"MACH: 14.0\nPR_T: {pr_val:.4f}\nRMSE: {rmse_val:.4f}\nSTATUS: {status_txt}"
-        
-        props = dict(boxstyle='round,pad=0.5', facecolor='#222222', alpha=0.9, edgecolor=status_color, linewidth=1.5)
-        ax.text(0.70, 0.95, text_str, transform=ax.transAxes, fontsize=13, 
-                verticalalignment='top', bbox=props, family='monospace', color=status_color)
-
-        # Save
-        filename = f"frame_{iteration:03d}.png"
-        plt.savefig(filename, bbox_inches='tight')
-        image_paths.append(filename)
-        plt.close()
+    for (iteration, _, _, is_best), frame in zip(jobs, rendered):
+        if frame is None: continue
+        frames.append(frame)
 
         if is_best:
-            best_frame_path = filename
+            best_frame = frame
             print(f" -> Frame {iteration} (BEST) Created.")
         else:
             print(f" -> Frame {iteration} Created.")
 
-    return image_paths, best_frame_path
+    return frames, best_frame
 
-def make_gif_pillow(image_paths, best_frame_path):
-    if not image_paths: return
+def _to_global_palette(frames, best_frame):
+    """
+    Quantizes every RGB frame to one 128-colour palette built from the best
+    frame (gold) stacked on a regular frame (green), so both colour sets exist.
+    """
+    ref = next((f for f in frames if f is not best_frame), best_frame)
+    sheet = Image.new('RGB', (best_frame.width, best_frame.height + ref.height))
+    sheet.paste(best_frame, (0, 0))
+    sheet.paste(ref, (0, best_frame.height))
+    palette = sheet.convert('P', palette=Image.ADAPTIVE, colors=128)
+
+    def to_pal(im): return im.quantize(palette=palette, dither=Image.NONE)
+    return [to_pal(f) for f in frames], to_pal(best_frame)
+
+def make_gif_pillow(frames, best_frame):
+    if not frames: return
     
     print("Stitching GIF...")
-    frames = [Image.open(f) for f in image_paths]
     
     # Dramatic freeze at the end on the best frame
-    final_frame = Image.open(best_frame_path) if best_frame_path else frames[-1]
+    final_frame = best_frame if best_frame is not None else frames[-1]
     
-    # Duplicate last frame 20 times to keep it on screen
-    for _ in range(20):
-        frames.append(final_frame.copy())
+    # One palette for every frame (no per-frame adaptive palettes -> no flicker)
+    frames, final_frame = _to_global_palette(frames, final_frame)
+
+    # Repeat last frame 20 times to keep it on screen (same object, no copies)
+    frames = frames + [final_frame] * 20
 
     frames[0].save(
         OUTPUT_GIF,
         save_all=True,
         append_images=frames[1:], 
         duration=FRAME_DURATION_MS, 
-        loop=0 
+        loop=0,
+        optimize=True,
+        disposal=2
     )
-            
-    # Clean temporary files
-    for f in image_paths: 
-        if os.path.exists(f): os.remove(f)
     print(f"Done! Saved as {OUTPUT_GIF}")
 
 if __name__ == "__main__":
-    paths, best = create_frames_from_log()
-    make_gif_pillow(paths, best)
\ No newline at end of file
+    frames, best = create_frames_from_log()
+    make_gif_pillow(frames, best)
\ No newline at end of file
@@ -1,9 +1,12 @@
 import matplotlib
 matplotlib.use('Agg') 
+import functools
+import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 import re
 
@@ -31,12 +34,51 @@ U_INF = 1882.0
 T_INF = 47.4
 FRAME_DURATION = 150 # ms
 
+# Tecplot VARIABLES header: "x","y","Density",...
+_VAR_RE = re.compile(r'"([^"]*)"')
+# Normalized (lowercase, no '_'/'-') header substring -> short name, first hit wins
+_COL_KEYS = (
+    ('coordinatex', 'x'),
+    ('temperature', 'T'),
+    ('velocityx', 'u'),
+    ('xvelocity', 'u'),
+    ('momentumx', 'mom_x'),
+    ('xmomentum', 'mom_x'),
+    ('density', 'rho'),
+)
+
 def load_dns():
     if not DNS_FILE.exists(): return None, None
-    df = pd.read_csv(DNS_FILE)
-    return df.iloc[:, 0].values, df.iloc[:, 1].values
+    return _load_dns(str(DNS_FILE.resolve()))
+
+@functools.lru_cache(maxsize=4)
+def _load_dns(dns_csv):
+    """DNS (u, T) as contiguous float64 arrays sorted by u, parsed once per file."""
+    d = pd.read_csv(dns_csv).to_numpy(dtype=np.float64)
+    order = np.argsort(d[:, 0], kind='stable')
+    return np.ascontiguousarray(d[order, 0]), np.ascontiguousarray(d[order, 1])
 
 def load_simulation_profile(folder_path):
+    """ Profile at X_STATION, preferring the flow.parquet written by SU2Interface.organize_files """
+    df = None
+    pq_file = folder_path / "flow.parquet"
+    if pq_file.exists():
+        try:
+            df = pd.read_parquet(pq_file, columns=['x', 'T', 'u'])
+        except Exception as e:
+            print(f"Error loading {pq_file}: {e} (falling back to flow.dat)")
+    if df is None:
+        df = _load_dat(folder_path)
+    if df is None: return None
+
+    slice_df = df[ (df['x'] > X_STATION - X_TOL) & (df['x'] < X_STATION + X_TOL) ]
+    if slice_df.empty: return None
+
+    # assign() returns a new frame, no defensive copy of the slice
+    return slice_df.assign(u_norm=lambda d: d['u'].to_numpy() / U_INF,
+                           t_norm=lambda d: d['T'].to_numpy() / T_INF).sort_values(by='u_norm')
+
+def _load_dat(folder_path):
     dat_file = folder_path / "flow.dat"
     if not dat_file.exists(): return None
     
@@ -48,51 +90,123 @@ def load_simulation_profile(folder_path):
         header_rows = 0
         col_names = []
         for i, line in enumerate(lines):
-            if "VARIABLES" in line: col_names = re.findall(r'"(.*?)"', line)
+            if "VARIABLES" in line: col_names = _VAR_RE.findall(line)
             if "ZONE" in line: header_rows = i + 1; break
         
-        # Robust loading for large Mach 14 files
+        # Map header names first, so only the needed columns are parsed
+        rename_map = {}
+        for col in col_names:
+            c = col.lower().replace('_', '').replace('-', '')
+            out = 'x' if c == 'x' else next((name for key, name in _COL_KEYS if key in c), None)
+            if out and out not in rename_map.values(): rename_map[col] = out
+
+        # Robust loading for large Mach 14 files: C tokenizer (sep=r'\s+' stays
+        # on engine='c'), float32 parsed directly, needed columns only
         df = pd.read_csv(dat_file, 
                          skiprows=header_rows, 
-                         sep='\s+', 
+                         sep=r'\s+', 
                          names=col_names, 
+                         usecols=list(rename_map),
+                         dtype=np.float32,
                          on_bad_lines='skip', 
                          low_memory=False, 
                          engine='c')
-        
-        rename_map = {}
-        for col in df.columns:
-            c = col.lower()
-            if 'x' == c or "coordinatex" in c: rename_map[col] = 'x'
-            if "temperature" in c: rename_map[col] = 'T'
-            if "velocity" in c and "x" in c: rename_map[col] = 'u'
-            if "momentum" in c and "x" in c: rename_map[col] = 'mom_x'
-            if "density" in c: rename_map[col] = 'rho'
             
         df.rename(columns=rename_map, inplace=True)
         
-        # Force numeric conversion to handle malformed data
-        for col in ['x', 'T', 'u', 'mom_x', 'rho']:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        
         if 'u' not in df.columns and 'mom_x' in df.columns: df['u'] = df['mom_x'] / df['rho']
         if 'u' not in df.columns or 'T' not in df.columns: return None
 
         # Drop rows with NaN values in critical columns
-        df = df.dropna(subset=['x', 'T', 'u'])
-        
-        slice_df = df[ (df['x'] > X_STATION - X_TOL) & (df['x'] < X_STATION + X_TOL) ].copy()
-        if slice_df.empty: return None
-
-        slice_df['u_norm'] = slice_df['u'] / U_INF
-        slice_df['t_norm'] = slice_df['T'] / T_INF
-        return slice_df.sort_values(by='u_norm')
+        return df.dropna(subset=['x', 'T', 'u'])
 
     except Exception as e: 
         print(f"Error loading {dat_file}: {e}")
         return None
 
+# Per-process figure and the artists updated per frame, built by _init_figure
+_FRAME = None
+
+def _init_figure(dns_u, dns_t, baseline):
+    """ Builds the frame figure once per (worker) process: DNS/baseline/axes are drawn here """
+    global _FRAME
+
+    # --- PLOTTING ---
+    # One figure for every frame: DNS/baseline/axes are drawn once, the RANS
+    # line, title and HUD are updated per iteration
+    fig, ax = plt.subplots(figsize=(10, 8), dpi=100) # 1000x800 px, palette GIF hides the rest
+    
+    if dns_u is not None:
+        ax.plot(dns_u, dns_t, 'o', color='white', markersize=4, alpha=0.6, label='DNS (Ground Truth)')
+
+    if baseline is not None:
+        ax.plot(baseline[0], baseline[1], 
+                color='#ff0055', linestyle='--', linewidth=1.5, alpha=0.5, label='Initial Guess')
+
+    line_rans, = ax.plot([], [], color='#00ff9d', linewidth=3)
+
+    title = ax.set_title("", fontsize=16, color='white', pad=15)
+    ax.set_xlabel(r"Normalized Velocity ($u/u_{\infty}$)", fontsize=14)
+    ax.set_ylabel(r"Normalized Temperature ($T/T_{\infty}$)", fontsize=14)
+    
+    ax.set_xlim(0, 1.1)
+    ax.set_ylim(0, 14)
+    
+    ax.grid(True, linestyle='--', alpha=0.2)
+
+    # Tight margins computed once (replaces savefig's bbox_inches='tight'),
+    # with a two-line title so the per-frame text always fits
+    title.set_text("SciML Calibration: Matching Physics vs. DNS\nIteration 00 | Pr_t = 0.0000")
+    fig.tight_layout()
+
+    # HUD: one artist, text/colours set per frame
+    hud = ax.text(0.05, 0.95, "", transform=ax.transAxes, fontsize=14, 
+                  verticalalignment='top', bbox=dict(facecolor='#222222', edgecolor='#00ff9d', alpha=0.8), 
+                  family='monospace', color='#00ff9d')
+
+    _FRAME = (fig, ax, line_rans, title, hud)
+
+def _render_frame(job):
+    """ Renders one log row (iteration, Pr_t, RMSE, is_best) to an RGB frame, None if loading failed """
+    iteration, pr_val, current_rmse, is_best = job
+    
+    folder_path = RESULTS_DIR / f"Pr_{pr_val:.4f}"
+    
+    df = load_simulation_profile(folder_path)
+    if df is None: 
+        print(f"Skipping Iter {iteration} (Load failed)")
+        return None
+
+    fig, ax, line_rans, title, hud = _FRAME
+
+    # Colors by status
+    line_color = '#ffd700' if is_best else '#00ff9d'
+    label_str = f'OPTIMAL RANS' if is_best else f'Iter {iteration}'
+    z_order = 10 if is_best else 5 # Make sure best line is on top
+    
+    line_rans.set_data(df['u_norm'].to_numpy(), df['t_norm'].to_numpy())
+    line_rans.set_color(line_color)
+    line_rans.set_label(label_str)
+    line_rans.set_zorder(z_order)
+
+    title.set_text(f"SciML Calibration: Matching Physics vs. DNS\nIteration {iteration} | Pr_t = {pr_val:.4f}")
+    
+    # Rebuilt per frame so the RANS entry takes the current label/colour
+    ax.legend(loc='upper right', fontsize=12, facecolor='#111111', edgecolor='#333333')
+
+    # HUD
+    status_txt = "OPTIMAL SOLUTION" if is_best else "LEARNING"
+    status_color = '#ffd700' if is_best else '#00ff9d'
+    
+    hud_txt = f"RMSE: {current_rmse:.4f}\nStatus: {status_txt}"
+    hud.set_text(hud_txt)
+    hud.set_color(status_color)
+    hud.get_bbox_patch().set_edgecolor(status_color)
+
+    # Render in memory, no PNG on disk; kept as RGB until the GIF palette is chosen
+    fig.canvas.draw()
+    return Image.fromarray(np.asarray(fig.canvas.buffer_rgba())).convert('RGB')
+
 def create_frames():
     if not LOG_FILE.exists(): return [], None
     df_log = pd.read_csv(LOG_FILE)
@@ -103,103 +217,76 @@ def create_frames():
     dns_u, dns_t = load_dns()
     
     # Load Baseline
-    baseline_df = None
+    baseline = None
     first_run_folder = RESULTS_DIR / f"Pr_{df_log.iloc[0]['Pr_t']:.4f}"
     if first_run_folder.exists():
         baseline_df = load_simulation_profile(first_run_folder)
+        if baseline_df is not None:
+            baseline = (baseline_df['u_norm'].to_numpy(), baseline_df['t_norm'].to_numpy())
 
-    image_paths = []
-    best_frame_path = None
+    frames = []
+    best_frame = None
 
     print(f"Generating profiles based on Log Order ({len(df_log)} runs)...")
 
-    for index, row in df_log.iterrows():
-        iteration = int(row['Iteration'])
-        pr_val = row['Pr_t']
-        current_rmse = row['RMSE']
-        
-        folder_path = RESULTS_DIR / f"Pr_{pr_val:.4f}"
-        
-        df = load_simulation_profile(folder_path)
-        if df is None: 
-            print(f"Skipping Iter {iteration} (Load failed)")
-            continue
-        
-        # === FIX 2: Compare floats with tolerance ===
-        is_best = np.isclose(current_rmse, min_rmse_val, atol=1e-6)
+    # === FIX 2: Compare floats with tolerance ===
+    jobs = [(int(row['Iteration']), row['Pr_t'], row['RMSE'], bool(np.isclose(row['RMSE'], min_rmse_val, atol=1e-6)))
+            for _, row in df_log.iterrows()]
 
-        # --- PLOTTING ---
-        fig, ax = plt.subplots(figsize=(10, 8), dpi=200)
-        
-        if dns_u is not None:
-            ax.plot(dns_u, dns_t, 'o', color='white', markersize=4, alpha=0.6, label='DNS (Ground Truth)')
+    # Frames are independent: render them on all cores, each worker draws on its own figure
+    # (map() returns them in log order)
+    n_workers = max(1, min(len(jobs), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_figure,
+                             initargs=(dns_u, dns_t, baseline)) as pool:
+        rendered = list(pool.map(_render_frame, jobs))
 
-        if baseline_df is not None:
-            ax.plot(baseline_df['u_norm'], baseline_df['t_norm'], 
-                    color='#ff0055', linestyle='--', linewidth=1.5, alpha=0.5, label='Initial Guess')
-
-        # Colors by status
-        line_color = '#ffd700' if is_best else '#00ff9d'
-        label_str = f'OPTIMAL RANS' if is_best else f'Iter {iteration}'
-        z_order = 10 if is_best else 5 # Make sure best line is on top
-        
-        ax.plot(df['u_norm'], df['t_norm'], color=line_color, linewidth=3, label=label_str, zorder=z_order)
-
-        ax.set_title(f"SciML Calibration: Matching Physics vs. DNS\nIteration {iteration} | Pr_t = {pr_val:.4f}", 
-                     fontsize=16, color='white', pad=15)
-        ax.set_xlabel(r"Normalized Velocity ($u/u_{\infty}$)", fontsize=14)
-        ax.set_ylabel(r"Normalized Temperature ($T/T_{\infty}$)", fontsize=14)
-        
-        ax.set_xlim(0, 1.1)
-        ax.set_ylim(0, 14)
-        
-        ax.grid(True, linestyle='--', alpha=0.2)
-        ax.legend(loc='upper right', fontsize=12, facecolor='#111111', edgecolor='#333333')
-
-        # HUD
-        status_txt = "OPTIMAL SOLUTION" if is_best else "LEARNING"
-        status_color = '#ffd700' if is_best else '#00ff9d'
-        
-        hud_txt = f"RMSE: {current_rmse:.4f}\nStatus: {status_txt}"
-        ax.text(0.05, 0.95, hud_txt, transform=ax.transAxes, fontsize=14, 
-                verticalalignment='top', bbox=dict(facecolor='#222222', edgecolor=status_color, alpha=0.8), 
-                family='monospace', color=status_color)
-
-        fname = f"prof_iter_{iteration:03d}.png"
-        plt.savefig(fname, bbox_inches='tight')
-        image_paths.append(fname)
-        plt.close()
+    for (iteration, pr_val, _, is_best), frame in zip(jobs, rendered):
+        if frame is None: continue
+        frames.append(frame)
         
         if is_best:
-            best_frame_path = fname
+            best_frame = frame
             print(f" -> Iteration {iteration} (Pr={pr_val:.4f}) [BEST HIT - GOLD FRAME]")
         else:
             print(f" -> Iteration {iteration}")
 
-    return image_paths, best_frame_path
+    return frames, best_frame
 
-def make_gif(paths, best_frame_path):
-    if not paths: return
-    
-    frames = [Image.open(p) for p in paths]
+def _to_global_palette(frames, best_frame):
+    """
+    Quantizes every RGB frame to one 128-colour palette built from the best
+    frame (gold) stacked on a regular frame (green), so both colour sets exist.
+    """
+    ref = next((f for f in frames if f is not best_frame), best_frame)
+    sheet = Image.new('RGB', (best_frame.width, best_frame.height + ref.height))
+    sheet.paste(best_frame, (0, 0))
+    sheet.paste(ref, (0, best_frame.height))
+    palette = sheet.convert('P', palette=Image.ADAPTIVE, colors=128)
+
+    def to_pal(im): return im.quantize(palette=palette, dither=Image.NONE)
+    return [to_pal(f) for f in frames], to_pal(best_frame)
+
+def make_gif(frames, best_frame):
+    if not frames: return
     
-    # Freeze logic: Make sure we explicitly load the BEST frame for the freeze
-    if best_frame_path and Path(best_frame_path).exists():
-        last = Image.open(best_frame_path)
-        print(f"Freezing on BEST frame: {best_frame_path}")
+    # Freeze logic: Make sure we explicitly use the BEST frame for the freeze
+    if best_frame is not None:
+        last = best_frame
+        print("Freezing on BEST frame.")
     else:
         last = frames[-1]
         print("Warning: Best frame not found, freezing last frame.")
     
-    # Add 20 frames of the winner at the end
-    for _ in range(20): frames.append(last.copy())
-    
-    frames[0].save(OUTPUT_GIF, save_all=True, append_images=frames[1:], duration=FRAME_DURATION, loop=0)
+    # One palette for every frame (no per-frame adaptive palettes -> no flicker)
+    frames, last = _to_global_palette(frames, last)
+
+    # Add 20 frames of the winner at the end (same object, no copies)
+    frames = frames + [last] * 20
     
-    # Cleanup
-    for p in paths: Path(p).unlink(missing_ok=True)
+    frames[0].save(OUTPUT_GIF, save_all=True, append_images=frames[1:], duration=FRAME_DURATION, loop=0,
+                   optimize=True, disposal=2)
     print(f"Done! {OUTPUT_GIF}")
 
 if __name__ == "__main__":
-    paths, best_path = create_frames()
-    make_gif(paths, best_path)
\ No newline at end of file
+    frames, best_frame = create_frames()
+    make_gif(frames, best_frame)
\ No newline at end of file
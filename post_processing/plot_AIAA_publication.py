@@ -1,46 +1,68 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib
+import numpy as np
+import csv
+import functools
+import math
+import mmap
+import os
 from pathlib import Path
 import re
 
 # ==========================================
 #              CONFIGURATION
 # ==========================================
-# Basic Paths
+# Basic Paths (resolved once)
 SCRIPT_DIR = Path(__file__).resolve().parent
-RESULTS_ROOT = SCRIPT_DIR.parent / "results"
+PROJECT_DIR = SCRIPT_DIR.parent
+RESULTS_ROOT = PROJECT_DIR / "results"
+
+# Tecplot VARIABLES header: "x","y","Density",...
+_VAR_RE = re.compile(r'"([^"]*)"')
+# Tecplot ZONE header: ZONE NODES= 209825, ELEMENTS= ...
+_NODES_RE = re.compile(rb'NODES\s*=\s*(\d+)')
+
+# Canonical SU2 Tecplot VARIABLES names -> short names (single rename, no string tests)
+_SU2_RENAME = {'x': 'x', 'Density': 'rho', 'Momentum_x': 'mom_x', 'Temperature': 'T'}
+
+# Fallback for non-canonical exports: (normalized substring, short name), first hit wins
+_RENAME_RULES = (
+    ('coordinatex', 'x'),
+    ('temperature', 'T'),
+    ('momentumx', 'mom_x'),
+    ('xmomentum', 'mom_x'),
+    ('density', 'rho'),
+)
 
 def _get_run_dir(root: Path) -> Path:
     """Prefer latest run folder (geometry_Niter_date); else flat results/ if legacy."""
-    run_dirs = [d for d in root.iterdir() if d.is_dir() and "iter" in d.name]
+    # DirEntry carries d_type from the directory read, so non-matching entries cost no stat()
+    with os.scandir(root) as it:
+        run_dirs = [e for e in it if "iter" in e.name and e.is_dir()]
     if run_dirs:
-        return max(run_dirs, key=lambda d: d.stat().st_mtime)
-    if (root / "optimization_log.csv").exists():
-        return root
-    return root
+        return Path(max(run_dirs, key=lambda e: e.stat().st_mtime).path)
+    return root  # Legacy layout: optimization_log.csv directly in results/
 
 RESULTS_DIR = _get_run_dir(RESULTS_ROOT)
 LOG_FILE = RESULTS_DIR / "optimization_log.csv"
 
-# Log DataFrame
-df_log = pd.read_csv(LOG_FILE)
-
-# Optimal Pr
-best_row_idx = df_log["RMSE"].idxmin()
-optimal_pr = df_log.loc[best_row_idx, "Pr_t"]
+# Optimal Pr: one streamed pass over the log keeping only the running
+# minimum, no DataFrame needed (O(1) memory for long logs)
+best_rmse, optimal_pr = math.inf, None
+with open(LOG_FILE, newline='') as f:
+    for row in csv.DictReader(f):
+        rmse = float(row["RMSE"])
+        if rmse < best_rmse:
+            best_rmse, optimal_pr = rmse, float(row["Pr_t"])
+if optimal_pr is None:
+    raise ValueError(f"CRITICAL: No valid RMSE entries in {LOG_FILE}")
 
 # 4 points after the dot
 optimal_pr_str = f"{optimal_pr:.4f}"
 
-print(f">>> Auto-detected Optimal Pr_t: {optimal_pr_str} (RMSE: {df_log.loc[best_row_idx, 'RMSE']:.5f})")
+print(f">>> Auto-detected Optimal Pr_t: {optimal_pr_str} (RMSE: {best_rmse:.5f})")
 
 DATA_FILE = RESULTS_DIR / f"Pr_{optimal_pr_str}" / "flow.dat"  # Optimized SU2 Result
-DNS_FILE = SCRIPT_DIR.parent / "data" / "DNS Dataset.csv"      # Benchmark Data
-
-# Safety Check - Data
-if not DATA_FILE.exists():
-    raise FileNotFoundError(f"CRITICAL: Could not find result file at {DATA_FILE}")
+DNS_FILE = PROJECT_DIR / "data" / "DNS Dataset.csv"           # Benchmark Data
 
 # Physics Constants (Mach 14 Case)
 U_INF = 1882.0
@@ -54,10 +76,17 @@ OUTPUT_PDF = "aiaa_plot_M14.pdf"
 # ==========================================
 #           PLOTTING STYLE (AIAA)
 # ==========================================
-# Configure Matplotlib to use DejaVu Serif fonts (Times New Roman) and LaTeX-style math
-plt.rcParams.update({
+# Imported only after the log has been read above, so a missing log file
+# fails fast without paying the matplotlib/font-manager start-up cost
+import matplotlib
+matplotlib.use('Agg', force=True) # Offscreen only (savefig), must be before pyplot
+import matplotlib.pyplot as plt
+
+# Configure Matplotlib to use DejaVu Serif fonts (bundled with matplotlib, no
+# fontconfig search for Times New Roman) and LaTeX-style math
+_AIAA_RC = {
     "font.family": "serif",
-    "font.serif": ["Times New Roman", "Times", "DejaVu Serif"],
+    "font.serif": ["DejaVu Serif"],
     "font.size": 10,
     "axes.labelsize": 10,
     "legend.fontsize": 9,
@@ -66,56 +95,142 @@ plt.rcParams.update({
     "lines.linewidth": 1.5,
     "figure.figsize": (3.5, 2.5),   # Single-column figure size (3.5 inch)
     "figure.dpi": 300,
-    "mathtext.fontset": "stix",  # LaTeX-like math rendering
-    "savefig.bbox": "tight" # Cutting white margins
-})
+    "mathtext.fontset": "dejavuserif",  # LaTeX-like math rendering, no STIX load
+    "savefig.bbox": "tight", # Cutting white margins
+    "path.simplify": True,          # Faster Agg rasterization of long lines
+    "path.simplify_threshold": 1.0,
+    "agg.path.chunksize": 10000
+}
+
+# Apply once per interpreter (skips the rcParams validators when the script
+# is re-run as a module, e.g. by a driver looping over cases)
+if not getattr(plt, '_aiaa_rc_done', False):
+    plt.rcParams.update(_AIAA_RC)
+    plt._aiaa_rc_done = True
 
 # ==========================================
 #             DATA HANDLING
 # ==========================================
 def load_robust_data(dat_file):
     """
-    Parses SU2 Tecplot (.dat) files robustly, handling variable headers 
-    and ensuring numeric conversion.
+    Loads an SU2 Tecplot (.dat) file, using a Parquet copy next to it when
+    that copy is at least as new as the .dat (needs pyarrow): the flow.parquet
+    written by SU2Interface.organize_files, else this script's flow_aiaa.parquet.
+    Repeated calls on an unchanged file are served from memory.
     """
     print(f"[IO] Loading file: {dat_file}")
-    with open(dat_file, 'r') as f:
-        lines = f.readlines()
-    
-    # Dynamic header detection
-    header_rows = 0
+    # Safety Check - Data (the stat doubles as the existence check)
+    dat_file = Path(dat_file)
+    try:
+        mtime_ns = dat_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"CRITICAL: Could not find result file at {dat_file}") from None
+    columns, values = _load_columns(str(dat_file), mtime_ns)
+    return pd.DataFrame(values, columns=list(columns))
+
+@functools.lru_cache(maxsize=8)
+def _load_columns(dat_path, mtime_ns):
+    """Parsed (columns, values) of dat_path; mtime_ns in the key drops stale entries."""
+    dat_file = Path(dat_path)
+    # Own cache under its own name: flow.parquet (x, y, T, u) belongs to organize_files
+    cache = dat_file.with_name('flow_aiaa.parquet')
+    df = None
+    for pq_file in (dat_file.with_name('flow.parquet'), cache):
+        df = _read_parquet(pq_file, mtime_ns)
+        if df is not None: break
+
+    if df is None:
+        df = _parse_tecplot(dat_file)
+        try:
+            df.to_parquet(cache, compression='zstd', index=False)
+            print(f"[IO] Cached parsed data: {cache}")
+        except (OSError, ImportError) as e:
+            print(f"[IO] Parquet cache skipped: {e}")
+
+    values = df.to_numpy(dtype=np.float32)
+    values.flags.writeable = False  # Shared by every caller, never mutate
+    return tuple(df.columns), values
+
+def _read_parquet(pq_file, mtime_ns):
+    """x, T, u from pq_file if it is at least as new as the .dat, else None."""
+    try:
+        if pq_file.stat().st_mtime_ns < mtime_ns: return None
+        df = pd.read_parquet(pq_file)
+    except (OSError, ImportError, ValueError):
+        return None  # No (usable) cache yet -> parse the .dat
+    if 'u' not in df.columns and {'mom_x', 'rho'}.issubset(df.columns):
+        df['u'] = np.divide(df['mom_x'].to_numpy(), df['rho'].to_numpy())
+    if not {'x', 'T', 'u'}.issubset(df.columns): return None
+    return df[['x', 'T', 'u']]
+
+def _standard_names(col_names):
+    """Maps the VARIABLES names this script uses to short names (x, T, mom_x, rho)."""
+    rename_map = {col: _SU2_RENAME[col] for col in col_names if col in _SU2_RENAME}
+    if not {'x', 'T'}.issubset(rename_map.values()):
+        rename_map = {}
+        for col in col_names:
+            c = col.lower().replace('-', '').replace('_', '')
+            new_name = 'x' if c == 'x' else next((name for key, name in _RENAME_RULES if key in c), None)
+            if new_name and new_name not in rename_map.values(): rename_map[col] = new_name
+    return rename_map
+
+def _line_end(mm, start):
+    """Offset of the newline ending the line that contains start (EOF if none)."""
+    end = mm.find(b"\n", start)
+    return len(mm) if end == -1 else end
+
+def _parse_tecplot(dat_file):
+    """
+    Parses SU2 Tecplot (.dat) files robustly, handling variable headers 
+    and ensuring numeric conversion. Only the columns used for the plot
+    (x, T, mom_x, rho) are parsed, as float32 (matplotlib's Agg works in
+    float32 anyway, so this halves memory traffic at no visible cost).
+    """
+    # Dynamic header detection: locate VARIABLES/ZONE with mmap.find (a C-level
+    # memchr scan), so nothing past the header is copied into Python
     col_names = []
-    for i, line in enumerate(lines):
-        if "VARIABLES" in line: 
-            col_names = re.findall(r'"(.*?)"', line)
-        if "ZONE" in line: 
-            header_rows = i + 1
-            break
-            
-    # Load data into DataFrame
-    df = pd.read_csv(dat_file, skiprows=header_rows, sep='\s+', names=col_names, on_bad_lines='skip')
-    
-    # Force numeric conversion to handle potential formatting errors
-    for col in df.columns: 
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Drop invalid rows
-    df.dropna(inplace=True)
-
-    # Standardize column names
-    rename_map = {}
-    for col in df.columns:
-        c = col.lower()
-        if 'x' == c or "coordinatex" in c: rename_map[col] = 'x'
-        if "temperature" in c: rename_map[col] = 'T'
-        if "momentum" in c and "x" in c: rename_map[col] = 'mom_x'
-        if "density" in c: rename_map[col] = 'rho'
-    
-    df.rename(columns=rename_map, inplace=True)
+    n_nodes = None
+    with open(dat_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            z_start = mm.find(b"ZONE")
+            if z_start == -1:
+                raise ValueError(f"No ZONE header found in {dat_file}")
+            z_end = _line_end(mm, z_start)
+            m = _NODES_RE.search(mm[z_start:z_end])
+            if m: n_nodes = int(m.group(1))
+
+            v_start = mm.find(b"VARIABLES", 0, z_start)
+            if v_start != -1:
+                col_names = _VAR_RE.findall(mm[v_start:_line_end(mm, v_start)].decode())
+
+        # Continue on the same handle from the first data line
+        f.seek(z_end + 1)
+
+        # Standardize column names and keep only the ones we need
+        rename_map = _standard_names(col_names)
+        keep = [i for i, col in enumerate(col_names) if col in rename_map]
+        names = [rename_map[col_names[i]] for i in keep]
+
+        if n_nodes is not None:
+            # The body is a plain float matrix: parse it with numpy's C loop,
+            # reading only the node rows (the element connectivity block that
+            # follows has a different column count)
+            arr = np.loadtxt(f, dtype=np.float32, max_rows=n_nodes, usecols=keep, ndmin=2)
+        else:
+            # No node count in the ZONE header: let the C tokenizer split on
+            # whitespace (sep=r'\s+' stays on engine='c'); short connectivity
+            # rows come back as NaN and are dropped below
+            arr = pd.read_csv(f, sep=r'\s+', names=col_names, usecols=keep, engine='c',
+                              dtype=np.float32, na_values=['NaN'], on_bad_lines='skip').to_numpy()
+
+    # Drop invalid rows (NaN or inf) in one pass over the matrix
+    arr = arr[np.isfinite(arr).all(axis=1)]
+    df = pd.DataFrame(arr, columns=names)
     
     # Calculate Velocity if missing (u = momentum / density)
+    # Divide the raw buffers: no index alignment, exactly one output array
     if 'u' not in df.columns and 'mom_x' in df.columns:
-        df['u'] = df['mom_x'] / df['rho']
+        df['u'] = np.divide(df['mom_x'].to_numpy(), df['rho'].to_numpy())
         
     return df
 
@@ -125,20 +240,18 @@ def load_robust_data(dat_file):
 def plot_aiaa_style():
     # 1. Load Datasets
     su2_df = load_robust_data(DATA_FILE)
-    dns_df = pd.read_csv(DNS_FILE)
+    dns_df = pd.read_csv(str(DNS_FILE))
     
     # 2. Extract Profile at Validation Station (x = 1.5m)
     # Using a small tolerance window to capture the slice
-    slice_df = su2_df[ (su2_df['x'] > 1.495) & (su2_df['x'] < 1.505) ].copy()
+    slice_df = su2_df[ (su2_df['x'] > 1.495) & (su2_df['x'] < 1.505) ]
     
-    # 3. Normalize Variables
+    # 3. Normalize Variables (assign() returns a new frame, no defensive copy)
     # Velocity normalized by Freestream Velocity (u_inf)
     # Temperature normalized by Freestream Temperature (T_inf)
-    slice_df['u_norm'] = slice_df['u'] / U_INF
-    slice_df['t_norm'] = slice_df['T'] / T_INF
-    
     # Sort by velocity for clean plotting lines
-    slice_df = slice_df.sort_values(by='u_norm')
+    slice_df = slice_df.assign(u_norm=lambda d: d['u'].to_numpy() / U_INF,
+                               t_norm=lambda d: d['T'].to_numpy() / T_INF).sort_values(by='u_norm')
     
     # 4. Generate Plot
     fig, ax = plt.subplots()
@@ -1,11 +1,22 @@
-import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg') # Batch runs only write PNGs: no GUI backend, must be before pyplot
 import matplotlib.pyplot as plt
-from scipy.optimize import minimize_scalar
+from scipy.optimize import minimize_scalar, differential_evolution
+# Optional: Gaussian-process Bayesian optimizer (Brent is used without scikit-optimize)
+try:
+    from skopt import gp_minimize
+    from skopt.acquisition import gaussian_ei
+except ImportError:
+    gp_minimize = None
 from su2_interface import SU2Interface 
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import time
+import os
+import logging
 import shutil
+import sys
 from datetime import datetime
 
 # ==========================================
@@ -15,78 +26,213 @@ BOUNDS = (0.5, 0.95) # Bounding Pr_t
 TOLERANCE = 1e-3
 MAX_ITER = 5
 LOG_FILE = "optimization_log.csv" # Log File - Csv
+# Concurrent SU2 runs. >1: differential evolution, population members run in
+# parallel, using WORKERS * num_cores cores
+WORKERS = 1
+# True: keep every non-crashed run in its own Pr_ folder (the GIF scripts in
+# post_processing/ animate all of them). False: only the current best is kept.
+# The comparison plot is drawn once, for the optimum, either way
+SAVE_EVERY = True
+# GP search stops early once the surrogate is confident: max Expected Improvement
+# over BOUNDS below EI_TOL and predictive std at its optimum below SIGMA_TOL (RMSE units)
+EI_TOL = 1e-3
+SIGMA_TOL = 5e-3
+# After FEASIBLE_WARMUP valid runs, a Pr_t more than FEASIBLE_MARGIN * (bounds
+# width) outside the valid Pr_t range AND past a run that crashed on that side
+# gets the crash penalty without running SU2
+FEASIBLE_WARMUP = 3
+FEASIBLE_MARGIN = 0.1
 
 # ==========================================
 #              GLOBAL OBJECTS
 # ==========================================
 runner = SU2Interface(num_cores=4)
+# Per-evaluation progress; level from PRT_LOG_LEVEL (e.g. WARNING for quiet cluster logs)
+log = logging.getLogger("prt_opt")
 
 iteration = 0
-history = []
+# History as column arrays (one slot per evaluation, grown on demand); the
+# CSV log is written line by line in record(), so no DataFrame is ever built
+LOG_DTYPES = {'Iteration': np.int32, 'Pr_t': np.float64, 'RMSE': np.float64, 'Time_Sec': np.float64, 'Cached': bool}
+hist = {col: np.empty(MAX_ITER + 1, dtype=dt) for col, dt in LOG_DTYPES.items()}
+n_hist = 0
+EVAL_CACHE = {} # round(Pr_t, 6) -> (RMSE, Pr_ folder suffix or None if nothing was saved)
+state_lock = threading.Lock() # iteration/hist/log are shared by concurrent runs
+save_lock = threading.Lock() # Orders organize_files and superseded-folder removal (see objective_function)
+best = {'key': None, 'pr_str': None, 'loss': float('inf')} # Best non-crashed run so far
+
+LOG_COLUMNS = tuple(LOG_DTYPES)
+LOG_FH = None # Opened in __main__: one line appended per evaluation
+# Post-run I/O (Parquet copies, removing superseded folders) runs here while the
+# next SU2 run computes; one worker keeps the jobs in submission order
+IO_POOL = ThreadPoolExecutor(max_workers=1)
+IO_JOBS = [] # Their Futures, checked in __main__ before the pool is shut down
 
 # ==========================================
 #              OPTIMIZATION ENGINE
 # ==========================================
 
+def record(entry):
+    """Stores one evaluation in the history arrays and appends it to the CSV log (flushed, so the log survives a crash)."""
+    global n_hist
+    with state_lock:
+        if n_hist == len(hist['Iteration']): # e.g. DE populations: more evaluations than MAX_ITER
+            for col in hist: hist[col] = np.resize(hist[col], 2 * n_hist)
+        for col in LOG_COLUMNS: hist[col][n_hist] = entry[col]
+        n_hist += 1
+        if LOG_FH is not None:
+            LOG_FH.write(",".join(str(entry[c]) for c in LOG_COLUMNS) + "\n")
+            LOG_FH.flush()
+
+def sort_log(log_file):
+    """Rewrites the CSV log in Iteration order (concurrent runs append in completion order)."""
+    with open(log_file) as f:
+        header, *rows = f.readlines()
+    ordered = sorted(rows, key=lambda row: int(row.split(',', 1)[0]))
+    if ordered != rows:
+        with open(log_file, "w") as f:
+            f.write(header)
+            f.writelines(ordered)
+
+def gp_confident(res):
+    """gp_minimize callback: True (stop) once neither improvement nor uncertainty is left on BOUNDS."""
+    if not res.models: return False # Still in the initial (random) points
+    try:
+        gp = res.models[-1]
+        X = res.space.transform(np.linspace(*BOUNDS, 200).reshape(-1, 1).tolist()) # GP works in [0, 1]
+        mu, sigma = gp.predict(X, return_std=True)
+        ei = gaussian_ei(X, gp, y_opt=np.min(res.func_vals), xi=0.01)
+        ei_max, sigma_best = float(np.max(ei)), float(sigma[np.argmin(mu)])
+    except Exception as e:
+        # Early stopping is an optimisation only: never let it abort the search
+        log.warning("!!! GP stopping check failed (%s), running the full budget.", e)
+        return False
+    if ei_max < EI_TOL and sigma_best < SIGMA_TOL:
+        log.info(">>> [Optimizer] GP converged (max EI %.2e, std at optimum %.2e). Stopping.", ei_max, sigma_best)
+        return True
+    return False
+
 def objective_function(pr_t):
     global iteration
-    iteration += 1
     
     # Formatting
     current_pr = float(pr_t)
-    run_id = f"Iter_{iteration}_Pr{current_pr:.4f}"
+    key = round(current_pr, 6)
+    pr_str = f"{current_pr:.4f}"
+
+    # --- 0. Re-queried Pr_t: reuse the earlier result instead of a new SU2 run ---
+    with state_lock:
+        cached = EVAL_CACHE.get(key)
+        iteration += 1
+        this_iter = iteration
+    if cached is not None:
+        loss = cached[0]
+        log.info(">>> [Optimizer] Iteration %d: Pr_t = %.4f already evaluated (RMSE: %.5f, cached)", this_iter, current_pr, loss)
+        record({
+            'Iteration': this_iter,
+            'Pr_t': current_pr,
+            'RMSE': loss,
+            'Time_Sec': 0.0,
+            'Cached': True
+        })
+        return loss
+
+    # --- 0b. Beyond a crash, well outside the Pr_t that converged: penalty, no SU2 run ---
+    with state_lock:
+        rmse = hist['RMSE'][:n_hist]
+        good_pr = hist['Pr_t'][:n_hist][rmse < 20]
+        bad_pr = hist['Pr_t'][:n_hist][rmse >= 20]
+    infeasible = False
+    if good_pr.size >= FEASIBLE_WARMUP:
+        margin = FEASIBLE_MARGIN * (BOUNDS[1] - BOUNDS[0])
+        lo, hi = good_pr.min(), good_pr.max()
+        below, above = bad_pr[bad_pr < lo], bad_pr[bad_pr > hi]
+        infeasible = (below.size > 0 and current_pr < min(lo - margin, below.max())) or \
+                     (above.size > 0 and current_pr > max(hi + margin, above.min()))
+    if infeasible:
+        log.warning(">>> [Optimizer] Iteration %d: Pr_t = %.4f outside the known-good range. Applying Penalty.", this_iter, current_pr)
+        record({
+            'Iteration': this_iter,
+            'Pr_t': current_pr,
+            'RMSE': 100.0,
+            'Time_Sec': 0.0,
+            'Cached': False
+        })
+        return 100.0
+
+    run_id = f"Iter_{this_iter}_Pr{current_pr:.4f}"
+
+    # Every run gets its own scratch dir (concurrent runs never collide, cleanup is one rmtree)
+    work_dir = runner.scratch_dir(run_id)
     
-    print(f"\n>>> [Optimizer] Iteration {iteration}: Testing Pr_t = {current_pr:.4f}")
-    start_time = time.time() # Time
+    log.info(">>> [Optimizer] Iteration %d: Testing Pr_t = %.4f", this_iter, current_pr)
+    start_time = time.perf_counter() # Monotonic: elapsed never jumps with the wall clock
     
     # --- 1. Run Pipeline ---
     try:
-        cfg_file = runner.generate_config(current_pr, run_id)
+        cfg_file = runner.generate_config(current_pr, run_id, work_dir=work_dir,
+                                          restart_file=runner.warm_start_file())
         
-        # Delete leftovers
-        flow_file = runner.SCRIPT_DIR / "flow.dat"
-        flow_file.unlink(missing_ok=True)
-        
-        success = runner.run_su2(cfg_file)
+        success = runner.run_su2(cfg_file, work_dir=work_dir)
         
         if not success:
-            print("!!! CFD Simulation Crashed. Applying Penalty.")
+            log.warning("!!! CFD Simulation Crashed. Applying Penalty.")
             loss = 100.0
         else:
-            loss = runner.calculate_loss("flow")
+            loss = runner.calculate_loss("flow", folder=work_dir)
+            if loss < 50.0:
+                runner.keep_warm_start(work_dir)
 
     except Exception as e:
-        print(f"!!! Critical Error in execution: {e}")
+        log.error("!!! Critical Error in execution: %s", e)
         loss = 100.0
 
-    elapsed = time.time() - start_time
-    print(f"   [Result] RMSE: {loss:.5f} | Time: {elapsed:.2f}s | Prandtl: {current_pr}")
+    elapsed = time.perf_counter() - start_time
+    log.info("   [Result] RMSE: %.5f | Time: %.2fs | Prandtl: %s", loss, elapsed, current_pr)
     
     # --- 2. Save Data ---
-    history.append({
-        'Iteration': iteration,
+    record({
+        'Iteration': this_iter,
         'Pr_t': current_pr,
         'RMSE': loss,
-        'Time_Sec': elapsed
+        'Time_Sec': elapsed,
+        'Cached': False
     })
-
-    pd.DataFrame(history).to_csv(LOG_FILE, index=False)
     
-    # --- 3. Visualize & Save per Iteration ---
-    if loss < 50.0:
-        pr_str = f"{current_pr:.4f}"
-        runner.plot_results("flow", pr_str)
-        runner.organize_files(pr_str)
+    # --- 3. Save (the plot is deferred to the optimum, see __main__) ---
+    # One step per run under save_lock: the old best's files are always moved in
+    # before a later run can queue the removal of its folder
+    superseded = None
+    with save_lock:
+        with state_lock:
+            saved = loss < 50.0 and (SAVE_EVERY or loss < best['loss'])
+            if loss < best['loss']:
+                if not SAVE_EVERY and best['key'] is not None:
+                    superseded = best['pr_str']
+                    EVAL_CACHE[best['key']] = (best['loss'], None)
+                best.update(key=key, pr_str=pr_str, loss=loss)
+            EVAL_CACHE[key] = (loss, pr_str if saved else None)
+        if saved:
+            job = runner.organize_files(pr_str, work_dir=work_dir, executor=IO_POOL)
+            if job is not None: IO_JOBS.append(job)
+        if superseded is not None and superseded != pr_str:
+            IO_JOBS.append(IO_POOL.submit(shutil.rmtree, runner.RESULTS_DIR / f"Pr_{superseded}"))
     
     # Clean up
-    runner.cleanup(run_id)
-    
+    runner.cleanup(run_id, work_dir=work_dir)
     return loss
 
 # ==========================================
 #              MAIN EXECUTION
 # ==========================================
 if __name__ == "__main__":
+    # stdout, next to the prints below (python run_optimization.py > job.log keeps everything)
+    level_name = os.environ.get("PRT_LOG_LEVEL", "INFO").upper()
+    level = getattr(logging, level_name, None)
+    logging.basicConfig(level=level if isinstance(level, int) else logging.INFO,
+                        stream=sys.stdout, format="%(asctime)s %(message)s")
+    if not isinstance(level, int):
+        log.warning("!!! Unknown PRT_LOG_LEVEL=%s, using INFO.", level_name)
     print("=== 🚀 Starting SciML Optimization Loop ===")
     # Use global runner so objective_function writes into the same run_dir
     ts = datetime.now().strftime("%y%m%d_%H%M")
@@ -94,61 +240,107 @@ if __name__ == "__main__":
     run_dir.mkdir(parents=True, exist_ok=True)
     runner.RESULTS_DIR = run_dir
     print(f"[Results] Run folder: {run_dir} (will be renamed at end)\n")
+
+    # Iterations Log: header once, then one flushed line per evaluation (see record)
+    LOG_FH = open(LOG_FILE, "w", buffering=8192)
+    LOG_FH.write(",".join(LOG_COLUMNS) + "\n")
     
-    # method='bounded': Brent's Method
-    res = minimize_scalar(
-        objective_function, 
-        bounds=BOUNDS, 
-        method='bounded',
-        options={'xatol': TOLERANCE, 'maxiter': MAX_ITER, 'disp': 3}
-    )
+    if WORKERS > 1:
+        # Population members are independent: evaluate them concurrently (the
+        # threads only wait on SU2 processes), deferred updating per generation
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            res = differential_evolution(
+                lambda x: objective_function(x[0]),
+                bounds=[BOUNDS],
+                maxiter=MAX_ITER,
+                popsize=8,
+                tol=TOLERANCE,
+                workers=pool.map,
+                updating='deferred',
+                polish=False
+            )
+        best_pr, best_rmse = float(res.x[0]), float(res.fun)
+    elif gp_minimize is not None:
+        # GP surrogate on (Pr_t, RMSE), next Pr_t by Expected Improvement:
+        # SU2 only runs where the predicted error is low or the fit is uncertain,
+        # and not at all once neither is left (gp_confident)
+        res = gp_minimize(
+            lambda x: objective_function(x[0]),
+            dimensions=[BOUNDS],
+            n_calls=MAX_ITER,
+            n_initial_points=3,
+            acq_func='EI',
+            xi=0.01,
+            callback=gp_confident
+        )
+        best_pr, best_rmse = float(res.x[0]), float(res.fun)
+    else:
+        # method='bounded': Brent's Method
+        res = minimize_scalar(
+            objective_function, 
+            bounds=BOUNDS, 
+            method='bounded',
+            options={'xatol': TOLERANCE, 'maxiter': MAX_ITER, 'disp': 0}
+        )
+        best_pr, best_rmse = float(res.x), float(res.fun)
+
+    # Pending Parquet copies land before the folder is renamed; failures are reported, not dropped
+    for job in IO_JOBS:
+        if job.exception() is not None:
+            log.error("!!! Background I/O failed: %s", job.exception())
+    IO_POOL.shutdown(wait=True)
+    LOG_FH.close()
+    LOG_FH = None
+    sort_log(LOG_FILE) # Post-processing (GIF frames, initial guess) reads the log in file order
 
     # --- OPTIMIZATION COMPLETE ---
     print("\n" + "="*40)
     print(f" OPTIMIZATION COMPLETE")
-    print(f" Best Pr_t Found: {res.x:.5f}")
-    print(f" Minimum RMSE:    {res.fun:.5f}")
+    print(f" Best Pr_t Found: {best_pr:.5f}")
+    print(f" Minimum RMSE:    {best_rmse:.5f}")
     print("="*40)
 
-    # 1. Iterations Log History
-    pd.DataFrame(history).to_csv(LOG_FILE, index=False)
+    # 1. Iterations Log History (already complete on disk, see record)
     print(f"[Log] History saved to {LOG_FILE}")
     
-    # 2. Convergence Plot
-    hist_df = pd.DataFrame(history)
+    # 2. Convergence Plot (straight from the history arrays, no DataFrame)
+    # Rows are stored in completion order (concurrent DE runs finish out of order)
+    order = np.argsort(hist['Iteration'][:n_hist], kind='stable')
+    iters, rmse = hist['Iteration'][:n_hist][order], hist['RMSE'][:n_hist][order]
     
     # Vaild runs
-    valid_runs = hist_df[hist_df['RMSE'] < 20]
-    crashed_runs = hist_df[hist_df['RMSE'] >= 20]
+    valid_idx = np.flatnonzero(rmse < 20)
+    crashed_idx = np.flatnonzero(rmse >= 20)
    
     # Plot:
     plt.figure(figsize=(10,6))
 
     # Real Convergence - Vaild runs
-    if not valid_runs.empty:
-        plt.plot(valid_runs['Iteration'], valid_runs['RMSE'], 'b-o', label='Optimization Path')
+    if valid_idx.size:
+        valid_rmse = rmse[valid_idx] # Gathered once, reused for path, best and ylim
+        plt.plot(iters[valid_idx], valid_rmse, 'b-o', label='Optimization Path')
         
         # Min from Valid runs
-        best_run_val = valid_runs['RMSE'].min()
-        best_run_idx = valid_runs['RMSE'].idxmin()
-        best_iter = valid_runs.loc[best_run_idx, 'Iteration']
+        best_pos = int(np.argmin(valid_rmse))
+        best_run_val = float(valid_rmse[best_pos])
+        best_iter = int(iters[valid_idx[best_pos]])
         
         plt.plot(best_iter, best_run_val, 'g*', markersize=20, markeredgecolor='k', label=f'Best (RMSE={best_run_val:.4f})', zorder=10)
 
         # Ylim [0.9 - 1.1]
-        y_min = valid_runs['RMSE'].min()
-        y_max = valid_runs['RMSE'].max()
+        y_min = best_run_val
+        y_max = float(valid_rmse.max())
         plt.ylim(y_min * 0.9, y_max * 1.1)
 
     # Marking Crashed runs
-    if not crashed_runs.empty:
+    if crashed_idx.size:
         # Location at the Ceiling of the Plot
         y_ceiling = plt.ylim()[1]
-        plt.scatter(crashed_runs['Iteration'], [y_ceiling * 0.95] * len(crashed_runs), 
+        plt.scatter(iters[crashed_idx], np.full(crashed_idx.size, y_ceiling * 0.95), 
                    c='red', marker='x', s=50, label='Crash Penalty')
     
     # --- Plotting the LAST iteration ---
-    plt.plot(hist_df.iloc[-1]['Iteration'], hist_df.iloc[-1]['RMSE'], 'r*', markersize=15,markeredgecolor='k', label='Last Iteration', zorder=10)
+    plt.plot(iters[-1], rmse[-1], 'r*', markersize=15,markeredgecolor='k', label='Last Iteration', zorder=10)
 
     plt.xlabel('Iteration')
     plt.ylabel('RMSE (Temperature Error)')
@@ -157,44 +349,56 @@ if __name__ == "__main__":
     plt.legend()
 
     # Save & Print
-    plt.savefig("optimization_convergence.png", dpi=150)
+    plt.savefig("optimization_convergence.png", dpi=100)
+    plt.close()
     print("[Log] Convergence plot saved.")
 
     # 3. Final Verification Run - OPTIMAL Pr_t
-    print("\n>>> Running Validation Case with OPTIMAL Parameters...")
-    optimal_pr = res.x
+    optimal_pr = best_pr
     optimal_pr_str = f"{optimal_pr:.4f}"
-    
-    final_cfg = runner.generate_config(optimal_pr, optimal_pr_str)
-    runner.run_su2(final_cfg)
-    runner.plot_results("flow", optimal_pr_str)
-    
-    # Organize files & Clean
-    runner.organize_files(optimal_pr_str) # Make Dir
-    runner.cleanup(optimal_pr_str)
+
+    # The optimum is normally one of the iterates: its results are already organized
+    cached = EVAL_CACHE.get(round(optimal_pr, 6))
+    if cached is not None and cached[1] and (runner.RESULTS_DIR / f"Pr_{cached[1]}" / "flow.dat").exists():
+        print(f"\n>>> OPTIMAL Pr_t already evaluated, results in Pr_{cached[1]}/ (validation run skipped)")
+        runner.plot_results("flow", optimal_pr_str, work_dir=runner.RESULTS_DIR / f"Pr_{cached[1]}")
+    else:
+        print("\n>>> Running Validation Case with OPTIMAL Parameters...")
+        final_dir = runner.scratch_dir(optimal_pr_str)
+        final_cfg = runner.generate_config(optimal_pr, optimal_pr_str, work_dir=final_dir,
+                                           restart_file=runner.warm_start_file())
+        runner.run_su2(final_cfg, work_dir=final_dir)
+        runner.plot_results("flow", optimal_pr_str, work_dir=final_dir)
+        
+        # Organize files & Clean
+        runner.organize_files(optimal_pr_str, work_dir=final_dir) # Make Dir
+        runner.cleanup(optimal_pr_str, work_dir=final_dir)
+    shutil.rmtree(runner.SCRATCH_DIR, ignore_errors=True)
     
     # --- Move Summary Files to [Results \ Run Folder] ---
     print(f"\n>>> Archiving summary files to run folder...")
-    for f_name in [LOG_FILE, "optimization_convergence.png"]:
-        src = Path(f_name)
-        dst = runner.RESULTS_DIR / f_name
-        if src.exists():
-            shutil.move(str(src), str(dst))
+    for f_name in (LOG_FILE, "optimization_convergence.png"):
+        try:
+            os.replace(f_name, runner.RESULTS_DIR / f_name) # Same filesystem: a plain rename
             print(f"       -> Moved: {f_name}")
+        except FileNotFoundError:
+            pass
 
     # --- Rename run folder to: geometry_niter_date (e.g. flatplate_M14_5iter_260207) ---
-    n_iter = len(history)
+    n_iter = n_hist
     geometry = runner.base_config.stem  # e.g. turb_SA_flatplate_M14Tw018
     date_short = datetime.now().strftime("%y%m%d")
     final_name = f"{geometry}_{n_iter}iter_{date_short}"
     run_dir = runner.RESULTS_DIR
     results_root = run_dir.parent
     final_path = results_root / final_name
-    if final_path.exists():
+    try:
+        run_dir.rename(final_path) # Fails if a (non-empty) folder of that name exists
+    except OSError:
         # avoid overwrite: append time
         final_name = f"{geometry}_{n_iter}iter_{date_short}_{datetime.now().strftime('%H%M')}"
         final_path = results_root / final_name
-    run_dir.rename(final_path)
+        run_dir.rename(final_path)
     print(f"\n>>> Results saved under: {final_path}")
 
     print("\n=== 🏁 Mission Accomplished. ===")
\ No newline at end of file
@@ -1,11 +1,22 @@
 import pandas as pd
 import numpy as np
 import subprocess
+import functools
+import math
 import os
 import re
+import signal
 import shutil
+import threading
+import logging
 from pathlib import Path
 
+# --- Optional: JIT-compiled RMSE kernel (NumPy path is used without numba) ---
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 # --- Force non-interactive backend for WSL ---
 import matplotlib
 matplotlib.use('Agg') # Must be before importing pyplot
@@ -17,16 +28,83 @@ BASE_CFG = SCRIPT_DIR.parent / "config" / "turb_SA_flatplate_M14Tw018.cfg"
 DNS_FILE = SCRIPT_DIR.parent / "data" / "DNS Dataset.csv"
 RESULTS_DIR = SCRIPT_DIR.parent / "results"
 
+# Child of run_optimization's "prt_opt" logger: PRT_LOG_LEVEL applies here too
+log = logging.getLogger("prt_opt.su2")
+
+# Tecplot VARIABLES header: "x","y","Density",...
+_VAR_RE = re.compile(r'"([^"]*)"')
+
+# Normalized (lowercase, no '_'/'-') header substring -> short name, first hit wins.
+# These are the only columns parsed from flow.dat (float32): the loss needs x, T
+# and u (or mom_x + rho), plot_results the same, save_parquet adds y. A column
+# used downstream must be listed here, or it is never read
+_COL_KEYS = (
+    ('coordinatex', 'x'),
+    ('coordinatey', 'y'),
+    ('temperature', 'T'),
+    ('velocityx', 'u'),
+    ('xvelocity', 'u'),
+    ('momentumx', 'mom_x'),
+    ('xmomentum', 'mom_x'),
+    ('density', 'rho'),
+)
+_COL_EXACT = {'x': 'x', 'y': 'y'}
+
+@functools.lru_cache(maxsize=4)
+def _load_dns(dns_csv):
+    """DNS (u, T) columns as read-only contiguous float64, sorted by u (parsed once per file)."""
+    d = pd.read_csv(dns_csv).to_numpy(dtype=np.float64)
+    order = np.argsort(d[:, 0], kind='stable')
+    dns_u = np.ascontiguousarray(d[order, 0])
+    dns_t = np.ascontiguousarray(d[order, 1])
+    dns_u.flags.writeable = dns_t.flags.writeable = False # Shared by every instance
+    return dns_u, dns_t
+
+def _rmse_merge(u, T, dns_u, dns_t, inv_U, inv_T):
+    """
+    RMSE of (u*inv_U, T*inv_T) vs the DNS curve in one pass: sort by u, keep the
+    first of duplicate u, then interpolate with a two-pointer merge (both sides
+    sorted) clamped to the end values like np.interp. dns_u must be sorted.
+    """
+    order = np.argsort(u * inv_U, kind='mergesort')
+    m = dns_u.shape[0]
+    j = 0
+    acc = 0.0
+    count = 0
+    prev = 0.0
+    for k in range(order.shape[0]):
+        i = order[k]
+        x = u[i] * inv_U
+        if count > 0 and x <= prev:
+            continue
+        prev = x
+        if x <= dns_u[0]:
+            t_dns = dns_t[0]
+        elif x >= dns_u[m - 1]:
+            t_dns = dns_t[m - 1]
+        else:
+            while dns_u[j + 1] <= x:
+                j += 1
+            t_dns = dns_t[j] + (x - dns_u[j]) * (dns_t[j + 1] - dns_t[j]) / (dns_u[j + 1] - dns_u[j])
+        d = T[i] * inv_T - t_dns
+        acc += d * d
+        count += 1
+    return np.sqrt(acc / count)
+
+_rmse_kernel = njit(cache=True, fastmath=True, boundscheck=False)(_rmse_merge) if njit else None
+
 class SU2Interface:
     def __init__(self, base_config = BASE_CFG, dns_csv = DNS_FILE, num_cores=4):
         self.SCRIPT_DIR = SCRIPT_DIR
         self.base_config = base_config
         self.num_cores = num_cores
         self.RESULTS_DIR = RESULTS_DIR
+        self.SCRATCH_DIR = SCRIPT_DIR / "scratch" # Per-run work dirs, see scratch_dir
         
-        self.dns_data = pd.read_csv(dns_csv)
-        self.dns_u = self.dns_data.iloc[:, 0].values
-        self.dns_t = self.dns_data.iloc[:, 1].values
+        # Sorted by u, contiguous float64 -> ready for np.interp as-is
+        self.dns_u, self.dns_t = _load_dns(str(Path(dns_csv).resolve()))
+        if _rmse_kernel is not None:
+            _rmse_kernel(np.ones(2), np.ones(2), self.dns_u, self.dns_t, 1.0, 1.0) # Compile (or load) before the first run
 
         # Physics Constants (Defaults for Mach 14 case)
         self.T_INF = 47.4      # Freestream Temperature [K]
@@ -39,156 +117,304 @@ class SU2Interface:
         # Simulation Settings
         self.ITERATIONS = 51
         self.SAVE_FREQ = 10
+        # Opt-in: start each run from the previous converged run's restart file.
+        # Saves SU2 iterations only if runs converge (CONV_RESIDUAL_MINVAL); with the
+        # capped ITERATIONS above they do not, so a warm-started RMSE depends on which
+        # earlier solution was reused: path-dependent noise that breaks the
+        # deterministic-objective assumption of Brent, the GP model and EVAL_CACHE
+        self.WARM_START = False
 
-    def generate_config(self, pr_t, run_id):
-        """Injects parameters into a temporary config file."""
-        new_cfg = SCRIPT_DIR / f"run_{run_id}.cfg"
+        # Early abort: rms[Rho] (log10, as SU2 writes it) above this, or NaN,
+        # for DIVERGENCE_ROWS consecutive history rows -> kill the run
+        self.DIVERGENCE_RMS = 3.0
+        self.DIVERGENCE_ROWS = 3
+        self.POLL_SEC = 0.5
+
+        # Config text built once; generate_config fills in Pr_t, the run settings and paths
+        self._cfg_template = self._build_cfg_template()
+
+        # Parsed Tecplot data, keyed by (absolute path, mtime) -> loss + plot parse once
+        self._tecplot_cache = {}
+
+        # pyplot is not thread-safe: concurrent runs (see work_dir) plot one at a time
+        self._plot_lock = threading.Lock()
+
+        # Per-thread last restart file (see keep_warm_start)
+        self._warm = threading.local()
+
+    def _build_cfg_template(self):
+        """Base config with the fixed overrides applied; Pr_t, ITER/OUTPUT_WRT_FREQ, mesh path and restart settings left as placeholders."""
         with open(self.base_config, 'r') as f:
             lines = f.readlines()
         
-        with open(new_cfg, 'w') as f:
-            for line in lines:
-                if "PRANDTL_TURB" in line:
-                    f.write(f"PRANDTL_TURB= {pr_t}\n")
-
-                elif "RESTART_SOL" in line:
-                    f.write("RESTART_SOL= NO\n")
-
-                elif "OUTPUT_WRT_FREQ" in line:
-                    f.write(f"OUTPUT_WRT_FREQ= {self.SAVE_FREQ}\n") # FREQ
-                elif line.strip().startswith("ITER="):
-                    f.write(f"ITER= {self.ITERATIONS}\n") # ITER
-
-                elif "OUTPUT_FILES" in line:
-                    f.write("OUTPUT_FILES= (RESTART, PARAVIEW, TECPLOT_ASCII)\n") # FILES
-                elif "VOLUME_FILENAME" in line:
-                    f.write("VOLUME_FILENAME= flow\n")
-                elif "CONV_FILENAME" in line:
-                    f.write(f"CONV_FILENAME= history\n")
-                elif "RESTART_FILENAME" in line:
-                    f.write("RESTART_FILENAME= restart_flow\n")
-                else:
-                    f.write(line)
+        out = []
+        self._mesh_name = self._solution_name = None
+        for line in lines:
+            if "PRANDTL_TURB" in line:
+                out.append("PRANDTL_TURB= __PR_T__\n")
+
+            elif "RESTART_SOL" in line:
+                out.append("RESTART_SOL= __RESTART_SOL__\n")
+            elif line.strip().startswith("SOLUTION_FILENAME"):
+                self._solution_name = line.split('=', 1)[1].strip()
+                out.append("SOLUTION_FILENAME= __SOLUTION__\n")
+
+            elif "OUTPUT_WRT_FREQ" in line:
+                out.append("OUTPUT_WRT_FREQ= __WRT_FREQ__\n") # FREQ
+            elif line.strip().startswith("ITER="):
+                out.append("ITER= __ITER__\n") # ITER
+
+            elif "OUTPUT_FILES" in line:
+                out.append("OUTPUT_FILES= (RESTART, PARAVIEW, TECPLOT_ASCII)\n") # FILES
+            elif "VOLUME_FILENAME" in line:
+                out.append("VOLUME_FILENAME= flow\n")
+            elif "CONV_FILENAME" in line:
+                out.append(f"CONV_FILENAME= history\n")
+            elif "RESTART_FILENAME" in line:
+                out.append("RESTART_FILENAME= restart_flow\n")
+            elif line.strip().startswith("MESH_FILENAME"):
+                self._mesh_name = line.split('=', 1)[1].strip()
+                out.append("MESH_FILENAME= __MESH__\n")
+            else:
+                out.append(line)
+        return "".join(out)
+
+    def generate_config(self, pr_t, run_id, work_dir=None, restart_file=None):
+        """Injects parameters into a temporary config file (in work_dir, default: script dir).
+        With a restart_file, SU2 starts from that solution instead of the freestream."""
+        work_dir = Path(work_dir or SCRIPT_DIR)
+        new_cfg = work_dir / f"run_{run_id}.cfg"
+        # Scratch run: the mesh stays next to the scripts. Paths relative to the run dir
+        # (SU2 splits values on spaces, commas, ':' and parentheses, so no absolute paths)
+        mesh = os.path.relpath(SCRIPT_DIR / (self._mesh_name or ""), work_dir)
+        text = self._cfg_template.replace("__PR_T__", str(pr_t)).replace("__MESH__", mesh)
+        # Read per call: ITERATIONS / SAVE_FREQ may be changed after construction
+        text = text.replace("__ITER__", str(self.ITERATIONS)).replace("__WRT_FREQ__", str(self.SAVE_FREQ))
+        if restart_file is not None:
+            solution = os.path.relpath(restart_file, work_dir)
+            text = text.replace("__RESTART_SOL__", "YES").replace("__SOLUTION__", solution)
+        else:
+            text = text.replace("__RESTART_SOL__", "NO").replace("__SOLUTION__", self._solution_name or "")
+        new_cfg.write_text(text)
         return new_cfg
 
-    def run_su2(self, cfg_file):
-        """Executes SU2 with MPI support."""
-        print(f"--> Running SU2 (Cores: {self.num_cores}) | Config: {cfg_file}")
+    def warm_start_file(self):
+        """Restart file of this thread's last converged run (None: cold start)."""
+        restart = getattr(self._warm, 'restart', None)
+        return restart if self.WARM_START and restart is not None and restart.exists() else None
+
+    def keep_warm_start(self, work_dir=None):
+        """Copies work_dir's restart_flow.dat aside as this thread's next initial solution."""
+        src = Path(work_dir or self.SCRIPT_DIR) / "restart_flow.dat"
+        if not self.WARM_START or not src.exists(): return
+        # One file per thread: concurrent workers each continue from their own last run
+        dst = self.SCRATCH_DIR / f"warm_start_{threading.get_ident()}.dat"
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(src, dst)
+        self._warm.restart = dst
+
+    def run_su2(self, cfg_file, work_dir=None):
+        """Executes SU2 with MPI support in work_dir, aborting early if the residuals diverge."""
+        log.info("--> Running SU2 (Cores: %d) | Config: %s", self.num_cores, cfg_file)
         command = ["SU2_CFD", cfg_file] # Serial run: SU2_CFD config.cfg
         if self.num_cores > 1:
             # Parallel run: mpirun -n 4 SU2_CFD config.cfg
             command = ["mpirun", "-n", str(self.num_cores), "SU2_CFD", cfg_file]            
+
+        work_dir = Path(work_dir or self.SCRIPT_DIR)
+        hist_file = work_dir / "history.csv"
+        hist_file.unlink(missing_ok=True) # Never judge this run by a previous run's residuals
+
+        # Own session -> the whole mpirun/SU2 process group can be killed at once
+        proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, start_new_session=True, cwd=work_dir)
         try:
-            subprocess.run(command, check=True, stdout= subprocess.DEVNULL) # stdout= subprocess.DEVNULL
-            return True
-        except subprocess.CalledProcessError:
-            print("!!! Simulation Crashed.")
+            while True:
+                try:
+                    returncode = proc.wait(timeout=self.POLL_SEC)
+                    break
+                except subprocess.TimeoutExpired:
+                    if self._diverged(hist_file):
+                        log.warning("!!! Residuals diverging. Aborting simulation.")
+                        return False
+        finally:
+            if proc.poll() is None:
+                os.killpg(proc.pid, signal.SIGTERM)
+                proc.wait()
+
+        if returncode != 0:
+            log.warning("!!! Simulation Crashed.")
             return False
+        return True
 
-    def load_tecplot_data(self, filename_base="flow"):
-        """Helper to load and clean Tecplot data"""
+    def _diverged(self, hist_file):
+        """True if the last DIVERGENCE_ROWS complete rows of history.csv have rms[Rho] above DIVERGENCE_RMS or NaN."""
+        try:
+            text = hist_file.read_text()
+        except OSError:
+            return False # Not written yet
+        lines = text.splitlines()
+        if not text.endswith("\n"): lines = lines[:-1] # Last row still being written
+        if len(lines) <= self.DIVERGENCE_ROWS: return False
+
+        header = [h.strip().strip('"') for h in lines[0].split(',')]
+        if 'rms[Rho]' not in header: return False
+        col = header.index('rms[Rho]')
+
+        for line in lines[-self.DIVERGENCE_ROWS:]:
+            try:
+                rms = float(line.split(',')[col])
+            except (ValueError, IndexError):
+                rms = math.nan
+            if math.isfinite(rms) and rms <= self.DIVERGENCE_RMS:
+                return False
+        return True
+
+    def load_tecplot_data(self, filename_base="flow", folder=None):
+        """Helper to load and clean Tecplot data (cached until the file changes)"""
         filename = Path(filename_base + ".dat")
 
-        # Build the full path
-        dat_file = self.SCRIPT_DIR / filename
+        # Build the full path (working dir by default, or an organized Pr_ folder)
+        dat_file = (Path(folder or self.SCRIPT_DIR) / filename).resolve()
         
         if not dat_file.exists(): 
-            print(f"!!! Warning: Could not find data file at: {dat_file}")
+            log.warning("!!! Warning: Could not find data file at: %s", dat_file)
             return None
 
-        with open(dat_file, 'r') as f:
-            lines = f.readlines()
-        
+        key = (dat_file, dat_file.stat().st_mtime)
+        if key in self._tecplot_cache:
+            return self._tecplot_cache[key].copy(deep=False)
+
+        # Stream the header only, stop at ZONE (never read the data body here)
         header_rows = 0
         col_names = []
-        for i, line in enumerate(lines):
-            if "VARIABLES" in line: col_names = re.findall(r'"(.*?)"', line)
-            if "ZONE" in line: header_rows = i + 1; break
+        with open(dat_file, 'r') as f:
+            for i, line in enumerate(f):
+                if "VARIABLES" in line: col_names = _VAR_RE.findall(line)
+                if "ZONE" in line:
+                    header_rows = i + 1
+                    break
             
         if not col_names: return None
 
-
-        df = pd.read_csv(dat_file, skiprows=header_rows, sep='\s+', names=col_names, on_bad_lines='skip')
-        
+        # Map header names first, so only the needed columns are parsed
         rename_map = {}
-        for col in df.columns:
-            c = col.lower()
-            if 'x' == c or "coordinatex" in c: rename_map[col] = 'x'
-            if "temperature" in c: rename_map[col] = 'T'
-            if "velocity" in c and ("_x" in c or "x" in c) and "y" not in c: rename_map[col] = 'u'
-            if "momentum" in c and ("_x" in c or "x" in c) and "y" not in c: rename_map[col] = 'mom_x'
-            if "density" in c: rename_map[col] = 'rho'
+        for col in col_names:
+            c = col.lower().replace('_', '').replace('-', '')
+            out = _COL_EXACT.get(c) or next((name for key, name in _COL_KEYS if key in c), None)
+            if out and out not in rename_map.values(): rename_map[col] = out
+        found = set(rename_map.values())
+        if not {'x', 'T'} <= found or not ('u' in found or {'mom_x', 'rho'} <= found):
+            log.warning("!!! Warning: %s lacks the x, T, u (or mom_x, rho) columns; header: %s", dat_file.name, col_names)
+            return None
+
+        # C tokenizer (sep=r'\s+' stays on engine='c'), float32, needed columns only
+        df = pd.read_csv(dat_file, skiprows=header_rows, sep=r'\s+', names=col_names,
+                         usecols=list(rename_map), engine='c', dtype=np.float32,
+                         low_memory=False, on_bad_lines='skip')
         
         df.rename(columns=rename_map, inplace=True)
         
         if 'u' not in df.columns and 'mom_x' in df.columns:
             df['u'] = df['mom_x'] / df['rho']
-            
-        return df
 
-    def calculate_loss(self, filename_base):
+        # Sort once by x so station slices are a binary search (see _station_slice)
+        if 'x' in df.columns:
+            df.sort_values('x', kind='stable', ignore_index=True, inplace=True)
+            df.attrs['x_sorted'] = True
+
+        self._tecplot_cache[key] = df
+        return df.copy(deep=False)
+
+    def _prune_tecplot_cache(self):
+        """Drops cache entries whose file was moved or deleted."""
+        for key in [k for k in list(self._tecplot_cache) if not k[0].exists()]:
+            self._tecplot_cache.pop(key, None)
+
+    def _station_slice(self, df):
+        """Rows with X_STATION - X_TOLERANCE < x < X_STATION + X_TOLERANCE (no copy, treat as read-only)."""
+        lo, hi = self.X_STATION - self.X_TOLERANCE, self.X_STATION + self.X_TOLERANCE
+        if df.attrs.get('x_sorted'):
+            xa = df['x'].to_numpy()
+            lo, hi = xa.dtype.type(lo), xa.dtype.type(hi) # Compare in the column dtype, like the mask
+            start, stop = np.searchsorted(xa, lo, side='right'), np.searchsorted(xa, hi, side='left')
+            return df.iloc[start:stop]
+        return df[(df['x'] > lo) & (df['x'] < hi)]
+
+    def calculate_loss(self, filename_base, folder=None):
         """Extracts profile at X_STATION and computes RMSE vs DNS."""
         try:
-            df = self.load_tecplot_data(filename_base)
+            df = self.load_tecplot_data(filename_base, folder=folder)
             if df is None: return 999.0
 
             # Filter Slice
-            slice_df = df[ (df['x'] > self.X_STATION - self.X_TOLERANCE) & 
-                           (df['x'] < self.X_STATION + self.X_TOLERANCE) ].copy()
+            slice_df = self._station_slice(df)
             if slice_df.empty: return 999.0
 
-            # Normalize
-            slice_df['u_norm'] = slice_df['u'] / self.U_INF
-            slice_df['t_norm'] = slice_df['T'] / self.T_INF
-            slice_df = slice_df.sort_values(by='u_norm').drop_duplicates(subset='u_norm')
+            u = slice_df['u'].to_numpy(dtype=np.float64)
+            t = slice_df['T'].to_numpy(dtype=np.float64)
+            if _rmse_kernel is not None:
+                return float(_rmse_kernel(u, t, self.dns_u, self.dns_t, 1.0 / self.U_INF, 1.0 / self.T_INF))
+
+            # Normalize (raw arrays, no intermediate Series)
+            u_n = u * (1.0 / self.U_INF)
+            t_n = t * (1.0 / self.T_INF)
+
+            # Sort by u_norm & keep the first of duplicate u_norm values
+            order = np.argsort(u_n, kind='stable')
+            u_n, t_n = u_n[order], t_n[order]
+            keep = np.concatenate(([True], np.diff(u_n) > 0))
+            u_n, t_n = u_n[keep], t_n[keep]
 
             # Interp & RMSE
-            t_dns_interp = np.interp(slice_df['u_norm'], self.dns_u, self.dns_t)
-            error = np.sqrt(((slice_df['t_norm'] - t_dns_interp) ** 2).mean())
+            t_dns_interp = np.interp(u_n, self.dns_u, self.dns_t)
+            error = float(np.sqrt(np.mean((t_n - t_dns_interp) ** 2)))
             return error
         except Exception as e:
-            print(f"!!! Error calculating loss: {e}")
+            log.error("!!! Error calculating loss: %s", e)
             return 999.0
 
-    def plot_results(self, filename_base, pr_val):
+    def plot_results(self, filename_base, pr_val, work_dir=None):
         """Generates and saves the comparison plot"""
         try:
-            df = self.load_tecplot_data(filename_base)
+            df = self.load_tecplot_data(filename_base, folder=work_dir)
             if df is None: return
 
-            slice_df = df[ (df['x'] > self.X_STATION - self.X_TOLERANCE) & 
-                           (df['x'] < self.X_STATION + self.X_TOLERANCE) ].copy()
+            slice_df = self._station_slice(df)
             if slice_df.empty: return
 
-            slice_df['u_norm'] = slice_df['u'] / self.U_INF
-            slice_df['t_norm'] = slice_df['T'] / self.T_INF
-            slice_df = slice_df.sort_values(by='u_norm')
+            # assign() adds the normalized columns to a new frame, the slice itself is never written
+            slice_df = slice_df.assign(u_norm=slice_df['u'].to_numpy() * (1.0 / self.U_INF),
+                                       t_norm=slice_df['T'].to_numpy() * (1.0 / self.T_INF)).sort_values(by='u_norm')
 
-            plt.figure(figsize=(10, 6), dpi=300)
-            plt.plot(self.dns_u, self.dns_t, 'k.', label='DNS Data', markersize=8)
-            plt.plot(slice_df['u_norm'], slice_df['t_norm'], 'r-', linewidth=2, label=f'SU2 (Pr_t={pr_val})')
-            
-            plt.title(f'Boundary Layer T-U Profile (Mach 14)\nPr_t = {pr_val}, RMSE calculated at x={self.X_STATION}m')
-            plt.xlabel('u / u_inf')
-            plt.ylabel('T / T_inf')
-            plt.legend()
-            plt.grid(True, alpha=0.3)
-            
             plot_name = f"plot_Pr{pr_val}.png"
-            plt.savefig(plot_name)
-            plt.close()
-            print(f"   [Plot] Saved: {plot_name}")
+            with self._plot_lock:
+                plt.figure(figsize=(10, 6), dpi=300)
+                plt.plot(self.dns_u, self.dns_t, 'k.', label='DNS Data', markersize=8)
+                plt.plot(slice_df['u_norm'], slice_df['t_norm'], 'r-', linewidth=2, label=f'SU2 (Pr_t={pr_val})')
+                
+                plt.title(f'Boundary Layer T-U Profile (Mach 14)\nPr_t = {pr_val}, RMSE calculated at x={self.X_STATION}m')
+                plt.xlabel('u / u_inf')
+                plt.ylabel('T / T_inf')
+                plt.legend()
+                plt.grid(True, alpha=0.3)
+                
+                plt.savefig(Path(work_dir or self.SCRIPT_DIR) / plot_name)
+                plt.close()
+            log.info("   [Plot] Saved: %s", plot_name)
             
         except Exception as e:
-            print(f"!!! Plotting error: {e}")
+            log.error("!!! Plotting error: %s", e)
 
-    def organize_files(self, pr_val):
-        """Moves simulation output files into a dedicated folders."""
+    def organize_files(self, pr_val, work_dir=None, executor=None):
+        """Moves simulation output files (from work_dir, default: script dir) into a dedicated folders.
+        With an executor, the Parquet copy is written there (overlapping the next SU2 run)
+        and its Future is returned, so the caller can check it."""
+        work_dir = Path(work_dir or SCRIPT_DIR)
         # 1. Define folder name (e.g., ../results/Pr_0.5)
         folder_name = self.RESULTS_DIR / f"Pr_{pr_val}"
         
         if not folder_name.exists():
-            print(f"   [Org] Created folder: {folder_name}")
+            log.info("   [Org] Created folder: %s", folder_name)
         folder_name.mkdir(parents=True, exist_ok=True)
 
         # 2. List of files to move (Data files + The Plot)
@@ -202,11 +428,14 @@ class SU2Interface:
             f"plot_Pr{pr_val}.png"
         ]
 
-        print(f"   [Org]  Moving files to: {folder_name}/")
+        log.info("   [Org]  Moving files to: %s/", folder_name)
+
+        # Parsed flow field (cached from calculate_loss/plot_results), saved as Parquet below
+        df = self.load_tecplot_data("flow", folder=work_dir)
 
         # 3. Move files loop
         for filename in files_to_move:
-            src = SCRIPT_DIR / filename # File Source
+            src = work_dir / filename # File Source
             dst = folder_name / filename # File Destination
                 
             if src.exists():
@@ -214,16 +443,53 @@ class SU2Interface:
                     dst.unlink()
                 
                 # Move the file
-                shutil.move(str(src), str(dst))
-                print(f"       -> Moved: {filename}")
+                shutil.move(src, dst)
+                log.info("       -> Moved: %s", filename)
 
+        # 4. Columnar copy for the post-processing scripts (no re-parse of flow.dat)
+        job = None
+        if df is not None:
+            if executor is None:
+                self.save_parquet(df, folder_name / "flow.parquet")
+            else:
+                job = executor.submit(self.save_parquet, df, folder_name / "flow.parquet")
 
-    def cleanup(self, run_id):
-        # Script Directory
-        files_to_remove = [
-            self.SCRIPT_DIR / f"run_{run_id}.cfg",
-            self.SCRIPT_DIR / "flow.dat"
-        ]
+        self._prune_tecplot_cache()
+        return job
+
+    def save_parquet(self, df, parquet_file):
+        """Writes the x, y, T, u columns as float32 Parquet (skipped without pyarrow)."""
+        cols = [c for c in ('x', 'y', 'T', 'u') if c in df.columns]
+        try:
+            df[cols].dropna().astype(np.float32).to_parquet(parquet_file, compression='zstd', index=False)
+            log.info("       -> Saved: %s", parquet_file.name)
+        except ImportError as e:
+            log.warning("   [Org]  Parquet skipped: %s", e)
+        except Exception as e:
+            # Optional copy (readers fall back to flow.dat): report, drop any partial file
+            log.error("!!! Parquet write failed for %s: %s", parquet_file, e)
+            Path(parquet_file).unlink(missing_ok=True)
+
+
+    def scratch_dir(self, run_id):
+        """Fresh per-run directory (under SCRATCH_DIR) for the config and every SU2 output."""
+        work_dir = self.SCRATCH_DIR / run_id
+        shutil.rmtree(work_dir, ignore_errors=True)
+        work_dir.mkdir(parents=True)
+        return work_dir
+
+    def cleanup(self, run_id, work_dir=None):
+        if work_dir is not None:
+            # The run's own scratch dir: whatever is left goes with it
+            shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            # Script Directory
+            files_to_remove = [
+                self.SCRIPT_DIR / f"run_{run_id}.cfg",
+                self.SCRIPT_DIR / "flow.dat"
+            ]
+
+            for file_path in files_to_remove:
+                file_path.unlink(missing_ok=True)
 
-        for file_path in files_to_remove:
-            file_path.unlink(missing_ok=True)
+        self._prune_tecplot_cache()